@@ -1,19 +1,37 @@
 import os
-import json
+import atexit
+import logging
 import csv
-from typing import List, Dict
+import re
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Dict, Iterator, Optional
 from dotenv import load_dotenv
-import requests
-from openai import OpenAI
-from datetime import datetime
-from pymongo import MongoClient
-from pymongo.collection import Collection
-from pymongo.database import Database
+import aiohttp
+from aiomultiprocess import Pool
+import orjson
+import httpx
+import openai
+from openai import AsyncOpenAI
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
 import hashlib
+import copy
+from collections import OrderedDict
+
+try:
+    import uvloop
+except ImportError:  # uvloop is unavailable on Windows; fall back to the default event loop
+    uvloop = None
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Get API keys and check if they exist
 JINA_API_KEY = os.getenv('JINA_API_KEY')
 if not JINA_API_KEY:
@@ -22,9 +40,357 @@ if not JINA_API_KEY:
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 MONGODB_URI = os.getenv('MONGODB_URI')
 
+# Maximum number of Jina requests in flight at once
+MAX_CONCURRENT_FETCHES = 20
+# Number of workers each carrying one URL through fetch -> extract -> save
+MAX_CONCURRENT_URLS = 50
+# Maximum number of URLs read ahead from the CSV while workers are busy
+URL_QUEUE_SIZE = 100
+# Most recent distinct page contents remembered for in-run dedup; older ones fall back to the extraction cache
+SEEN_CONTENT_LIMIT = 1000
+# Concurrent URLs handled by each worker process in process_urls_multiprocess
+CHILD_CONCURRENCY = 50
+# Maximum number of OpenAI extraction calls in flight at once (one micro-batch); size to your tier's RPM
+MAX_CONCURRENT_EXTRACTIONS = 10
+# How long (seconds) the extraction batcher waits to fill a micro-batch before dispatching it
+EXTRACTION_BATCH_WAIT = 0.05
+
+# Sustained request rates (requests per second) allowed against each API
+JINA_REQUESTS_PER_SECOND = 10
+OPENAI_REQUESTS_PER_SECOND = 50
+
+# Attempts per Jina/OpenAI call before giving up on transient failures
+RETRY_ATTEMPTS = 3
+# Longest wait (seconds) between attempts, including server-requested Retry-After delays
+MAX_RETRY_WAIT = 10
+# Per-request timeout (seconds) for OpenAI calls; a hung call would otherwise hold up its whole micro-batch
+OPENAI_REQUEST_TIMEOUT = 60
+
+# How long cached Jina pages and OpenAI extractions stay valid
+CACHE_TTL = timedelta(days=7)
+
+# Number of queued MongoDB upserts sent together in one bulk_write
+MONGODB_BATCH_SIZE = 100
+
+# Page content beyond this many characters is dropped before extraction to cap input tokens
+MAX_CONTENT_CHARS = 20000
+_INLINE_WHITESPACE = re.compile(r'[ \t]+')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+def _string() -> Dict:
+    """Schema for a single value that may be missing."""
+    return {"type": ["string", "null"]}
+
+def _array(items: Dict) -> Dict:
+    """Schema for a list of items (empty when nothing is found)."""
+    return {"type": "array", "items": items}
+
+def _object(properties: Dict) -> Dict:
+    """Schema for an object; structured outputs require every key to be listed and required."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+_STRINGS = _array(_string())
+
+# JSON schema enforced server-side via structured outputs.
+# Modify this to change the fields extracted from each page. Document metadata
+# (source URL, timestamp, schema version) is added on save, not by the model.
+PRODUCT_SCHEMA = _object({
+    "product_details": _object({
+        "title": _string(),
+        "brand": _string(),
+        "sku": _string(),
+        "main_image": _string(),
+        "secondary_images": _STRINGS,
+        "price_information": _object({
+            "current_price": _string(),
+            "original_price": _string(),
+            "currency": _string(),
+            "discount_percentage": _string(),
+            "price_per_unit": _string(),
+            "bulk_pricing": _array(_object({
+                "quantity": _string(),
+                "price": _string()
+            }))
+        }),
+        "availability": _object({
+            "status": _string(),
+            "quantity_available": _string(),
+            "delivery_estimate": _string()
+        })
+    }),
+    "product_content": _object({
+        "short_description": _string(),
+        "full_description": _string(),
+        "key_features": _STRINGS,
+        "bullet_points": _STRINGS,
+        "usage_instructions": _STRINGS,
+        "highlights": _array(_object({
+            "title": _string(),
+            "description": _string()
+        }))
+    }),
+    "technical_details": _object({
+        "dimensions": _object({
+            "length": _string(),
+            "width": _string(),
+            "height": _string(),
+            "weight": _string(),
+            "package_dimensions": _object({
+                "length": _string(),
+                "width": _string(),
+                "height": _string(),
+                "weight": _string()
+            })
+        }),
+        "specifications": _array(_object({
+            "category": _string(),
+            "attributes": _array(_object({
+                "name": _string(),
+                "value": _string(),
+                "unit": _string()
+            }))
+        })),
+        "materials": _STRINGS,
+        "certifications": _STRINGS,
+        "compatibility": _STRINGS
+    }),
+    "classification_tags": _object({
+        "product_type_tags": _STRINGS,
+        "style_tags": _STRINGS,
+        "color_tags": _STRINGS,
+        "material_tags": _STRINGS,
+        "occasion_tags": _STRINGS,
+        "season_tags": _STRINGS,
+        "fit_tags": _STRINGS,
+        "trend_tags": _STRINGS,
+        "demographic_tags": _STRINGS,
+        "price_tier_tags": _STRINGS,
+        "all_tags": _STRINGS
+    }),
+    "additional_information": _object({
+        "categories": _STRINGS,
+        "model_number": _string(),
+        "manufacturer": _object({
+            "name": _string(),
+            "country_of_origin": _string(),
+            "contact_info": _string()
+        }),
+        "warranty": _object({
+            "duration": _string(),
+            "type": _string(),
+            "coverage": _STRINGS
+        }),
+        "package_contents": _STRINGS,
+        "related_products": _array(_object({
+            "title": _string(),
+            "url": _string(),
+            "relationship_type": _string()
+        }))
+    }),
+    "purchase_information": _object({
+        "shipping": _object({
+            "methods": _array(_object({
+                "name": _string(),
+                "cost": _string(),
+                "estimated_days": _string()
+            })),
+            "free_shipping_threshold": _string(),
+            "restrictions": _STRINGS
+        }),
+        "return_policy": _object({
+            "duration": _string(),
+            "conditions": _STRINGS,
+            "restocking_fee": _string()
+        }),
+        "payment_methods": _STRINGS
+    }),
+    "reviews_and_ratings": _object({
+        "average_rating": _string(),
+        "total_reviews": _string(),
+        "rating_distribution": _object({
+            "5_star": _string(),
+            "4_star": _string(),
+            "3_star": _string(),
+            "2_star": _string(),
+            "1_star": _string()
+        }),
+        "featured_reviews": _array(_object({
+            "rating": _string(),
+            "title": _string(),
+            "content": _string(),
+            "author": _string(),
+            "date": _string(),
+            "verified_purchase": _string()
+        }))
+    })
+})
+# Version of PRODUCT_SCHEMA recorded in each saved document's metadata
+SCHEMA_VERSION = "1.0"
+
+# Request pieces that never change between calls, built once at import time
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are an expert e-commerce data extractor and product classifier. Extract all available information from the provided content according to the response schema. Generate comprehensive tags covering: product type, style, color, material, occasion, season, fit, trend, demographic, price tier. If information is not available, use null for single values or empty arrays [] for lists. Always generate at least 20 descriptive tags in all_tags."
+}
+USER_PROMPT_TEMPLATE = "Extract product data from this webpage ({url}): {content}"
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "Product", "schema": PRODUCT_SCHEMA, "strict": True}
+}
+EXTRACTION_MODEL = "gpt-4o-mini"
+
+# Fingerprint of everything that shapes an extraction; part of the extraction cache key so
+# edits to the schema, prompts or model don't return stale cached results
+EXTRACTION_CONFIG_HASH = hashlib.blake2b(
+    orjson.dumps([EXTRACTION_MODEL, SYSTEM_MESSAGE, USER_PROMPT_TEMPLATE, RESPONSE_FORMAT], option=orjson.OPT_SORT_KEYS),
+    digest_size=8
+).hexdigest()
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Whether a Jina or OpenAI failure is transient and worth retrying."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, (
+        aiohttp.ClientConnectionError,
+        asyncio.TimeoutError,
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError
+    ))
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds requested by a Retry-After header on the failed response, if any."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        headers = exc.headers
+    elif isinstance(exc, openai.APIStatusError):
+        headers = exc.response.headers
+    else:
+        return None
+    try:
+        return float(headers.get('Retry-After')) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+_backoff = wait_exponential_jitter(initial=1, max=MAX_RETRY_WAIT)
+
+def _wait_for_retry(retry_state) -> float:
+    """Honour Retry-After (capped at MAX_RETRY_WAIT) when sent, else back off exponentially with jitter."""
+    delay = _retry_after(retry_state.outcome.exception())
+    return min(delay, MAX_RETRY_WAIT) if delay is not None else _backoff(retry_state)
+
+# Retries transient Jina/OpenAI failures; the final failure is re-raised to the caller
+retry_transient = retry(
+    retry=retry_if_exception(_is_retryable),
+    stop=stop_after_attempt(RETRY_ATTEMPTS),
+    wait=_wait_for_retry,
+    reraise=True
+)
+
+class RateLimiter:
+    """Token bucket limiter: refills at a steady rate and only sleeps when the bucket is empty."""
+
+    def __init__(self, requests_per_second: float):
+        self.rate = requests_per_second
+        # Hold at least one token so rates below 1/s can still be served
+        self.capacity = max(1, requests_per_second)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then consume it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                elapsed = now - self.last_refill
+                self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+                self.last_refill = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncBatcher:
+    """Collects submitted items into micro-batches and dispatches one batch at a time.
+
+    Bursts of submissions are smoothed into a steady feed of at most max_batch_size
+    concurrent calls instead of all hitting the API at once.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int, max_queue_time: float):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self.queue: asyncio.Queue = None
+        self.task: asyncio.Task = None
+
+    async def process(self, item: Any) -> Any:
+        """Submit an item and wait for its result from the batch it lands in."""
+        if self.task is None or self.task.done():
+            self.queue = asyncio.Queue()
+            self.task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        return await future
+
+    async def stop(self):
+        """Stop the dispatch loop, failing any submissions that have not completed."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        # Items still queued would otherwise leave their callers waiting forever
+        while self.queue is not None and not self.queue.empty():
+            _, future = self.queue.get_nowait()
+            self._fail(future, RuntimeError("AsyncBatcher stopped before the item was processed"))
+
+    @staticmethod
+    def _fail(future: asyncio.Future, exc: BaseException):
+        if not future.done():
+            future.set_exception(exc)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            try:
+                deadline = loop.time() + self.max_queue_time
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                results = await self.process_batch([item for item, _ in batch])
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    self._fail(future, RuntimeError("AsyncBatcher stopped before the item was processed"))
+                raise
+            except Exception as e:
+                for _, future in batch:
+                    self._fail(future, e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
 class UniversalScraper:
-    def __init__(self, db_name: str = "web_scraper", collection_name: str = None):
-        # Print debug info for headers
+    def __init__(self, db_name: str = "web_scraper", collection_name: str = None, rate_share: float = 1.0):
         self.jina_headers = {
             'Authorization': f'Bearer {JINA_API_KEY}',
             'Content-Type': 'application/json',
@@ -32,27 +398,94 @@ class UniversalScraper:
             'X-With-Links-Summary': 'true',
             'X-With-Images-Summary': 'true'
         }
-        print("Debug - Authorization header:", self.jina_headers['Authorization'][:15] + "...")
+        logger.debug("Authorization header: %s...", self.jina_headers['Authorization'][:15])
+
+        # aiohttp session for Jina, created lazily inside the running event loop.
+        # aiohttp only speaks HTTP/1.1, so Jina relies on keep-alive connection reuse
+        # rather than HTTP/2 multiplexing; only the OpenAI client below uses HTTP/2.
+        self.session: aiohttp.ClientSession = None
+
+        # Persistent HTTP/2 client so OpenAI requests multiplex over shared connections
+        self.openai_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            max_retries=0,  # retries are handled by retry_transient
+            timeout=OPENAI_REQUEST_TIMEOUT,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60)
+            )
+        )
+        
+        # Throttle outgoing API calls to stay within each service's rate limits
+        # rate_share splits the limits when several processes scrape at once
+        self.jina_limiter = RateLimiter(JINA_REQUESTS_PER_SECOND * rate_share)
+        self.openai_limiter = RateLimiter(OPENAI_REQUESTS_PER_SECOND * rate_share)
+        self.fetch_semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
 
-        self.openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        # Smooths bursts of extraction requests into steady micro-batches
+        self.extract_batcher = AsyncBatcher(
+            self.extract_batch,
+            max_batch_size=MAX_CONCURRENT_EXTRACTIONS,
+            max_queue_time=EXTRACTION_BATCH_WAIT
+        )
         
         # MongoDB setup
-        self.mongo_client = MongoClient(MONGODB_URI)
-        self.db: Database = self.mongo_client[db_name]
+        self.mongo_client = AsyncIOMotorClient(MONGODB_URI)
+        self.db: AsyncIOMotorDatabase = self.mongo_client[db_name]
         
         if collection_name is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             collection_name = f"product_data_{timestamp}"
         
-        self.collection: Collection = self.db[collection_name]
-        print(f"Using MongoDB collection: {collection_name}")
+        self.collection: AsyncIOMotorCollection = self.db[collection_name]
+        logger.info("Using MongoDB collection: %s", collection_name)
+
+        # Upserts waiting to be flushed in the next bulk_write
+        self._pending: List[UpdateOne] = []
+
+        # Caches shared across runs so repeated URLs/pages skip paid API calls
+        self.jina_cache: AsyncIOMotorCollection = self.db["jina_cache"]
+        self.extraction_cache: AsyncIOMotorCollection = self.db["extraction_cache"]
 
     def generate_document_id(self, url: str) -> str:
         """Generate a unique ID for a document based on its URL."""
-        return hashlib.md5(url.encode()).hexdigest()
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()
+
+    def hash_content(self, content: str) -> str:
+        """Generate a cache key for a piece of page content."""
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+    def extraction_cache_key(self, content: str) -> str:
+        """Cache key for an extraction of already-trimmed content under the current config."""
+        return f"{EXTRACTION_CONFIG_HASH}:{self.hash_content(content)}"
 
-    def save_to_mongodb(self, data: Dict, url: str) -> bool:
-        """Save scraped data to MongoDB with error handling."""
+    async def read_cache(self, cache: AsyncIOMotorCollection, key: str) -> Dict:
+        """Return a cached value if present and younger than CACHE_TTL, else None."""
+        try:
+            cached = await cache.find_one({
+                '_id': key,
+                'fetched_at': {'$gt': datetime.now() - CACHE_TTL}
+            })
+            return orjson.loads(cached['value']) if cached else None
+        except (PyMongoError, KeyError, orjson.JSONDecodeError) as e:
+            # Unreadable or malformed entries are treated as a cache miss
+            logger.error("Error reading cache: %s", e)
+            return None
+
+    async def write_cache(self, cache: AsyncIOMotorCollection, key: str, value: Dict):
+        """Store a value in the cache, stamped with the current time."""
+        try:
+            # Stored as a JSON string since Jina responses may contain keys MongoDB rejects
+            await cache.replace_one(
+                {'_id': key},
+                {'value': orjson.dumps(value).decode(), 'fetched_at': datetime.now()},
+                upsert=True
+            )
+        except PyMongoError as e:
+            logger.error("Error writing cache: %s", e)
+
+    async def save_to_mongodb(self, data: Dict, url: str) -> bool:
+        """Queue scraped data for MongoDB, flushing once MONGODB_BATCH_SIZE upserts are pending."""
         try:
             # Generate a unique ID based on the URL
             doc_id = self.generate_document_id(url)
@@ -64,312 +497,354 @@ class UniversalScraper:
             data['metadata'].update({
                 'source_url': url,
                 'scrape_timestamp': datetime.now().isoformat(),
+                'schema_version': SCHEMA_VERSION,
                 '_id': doc_id
             })
             
             # Update if exists, insert if not
-            self.collection.update_one(
+            self._pending.append(UpdateOne(
                 {'_id': doc_id},
                 {'$set': data},
                 upsert=True
-            )
-            
-            print(f"Successfully saved data for {url} to MongoDB")
-            return True
+            ))
         except Exception as e:
-            print(f"Error saving to MongoDB: {str(e)}")
+            logger.error("Error saving to MongoDB: %s", e)
             return False
 
-    def fetch_page_content(self, url: str) -> Dict:
-        """Fetch page content with improved error handling and debugging."""
+        if len(self._pending) >= MONGODB_BATCH_SIZE:
+            return await self.flush_mongodb()
+        return True
+
+    async def flush_mongodb(self) -> bool:
+        """Write all pending upserts to MongoDB in a single bulk_write."""
+        if not self._pending:
+            return True
+        # Swap the buffer out before awaiting so concurrent saves queue into a fresh list
+        pending, self._pending = self._pending, []
         try:
-            print(f"\nDebug - Fetching URL: {url}")
-            print("Debug - Using headers:", json.dumps(self.jina_headers, indent=2))
-            
-            response = requests.post(
-                'https://r.jina.ai/',
+            result = await self.collection.bulk_write(pending, ordered=False)
+            logger.info("Successfully saved %d documents to MongoDB", result.upserted_count + result.matched_count)
+            return True
+        except Exception as e:
+            logger.error("Error saving to MongoDB: %s", e)
+            return False
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared Jina session, creating it on first use."""
+        if self.session is None or self.session.closed:
+            # Tuned for a single host: long keepalive and cached DNS maximize connection reuse
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=30,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True,
+                force_close=False
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
                 headers=self.jina_headers,
-                json={'url': url},
-                timeout=30
+                timeout=aiohttp.ClientTimeout(total=30),
+                raise_for_status=False
             )
-            
-            print(f"Debug - Response status code: {response.status_code}")
-            
-            if response.status_code != 200:
-                print(f"Debug - Error response content: {response.text}")
-                response.raise_for_status()
-                
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching {url}: {str(e)}")
-            if hasattr(e, 'response') and e.response:
-                print(f"Debug - Full error response: {e.response.text}")
+        return self.session
+
+    async def aclose(self):
+        """Close the HTTP and database clients held by the scraper."""
+        await self.extract_batcher.stop()
+        if self.session is not None:
+            await self.session.close()
+        await self.openai_client.close()
+        self.mongo_client.close()
+
+    async def fetch_page_content(self, url: str) -> Dict:
+        """Fetch page content with improved error handling and debugging."""
+        doc_id = self.generate_document_id(url)
+        cached = await self.read_cache(self.jina_cache, doc_id)
+        if cached:
+            logger.info("Using cached content for %s", url)
+            return cached
+
+        try:
+            logger.debug("Fetching URL: %s", url)
+            page_content = await self.post_to_jina(url)
+            await self.write_cache(self.jina_cache, doc_id, page_content)
+            return page_content
+        except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+            logger.error("Error fetching %s: %s", url, e)
             return None
 
-    def extract_structured_data(self, content: str, url: str) -> Dict:
+    @retry_transient
+    async def post_to_jina(self, url: str) -> Dict:
+        """Send a single request to the Jina reader endpoint."""
+        async with self.fetch_semaphore:
+            await self.jina_limiter.acquire()
+            async with self.get_session().post('https://r.jina.ai/', json={'url': url}) as response:
+                logger.debug("Response status code for %s: %d", url, response.status)
+                
+                if response.status != 200:
+                    logger.debug("Error response content: %s", await response.text())
+                    response.raise_for_status()
+                
+                return orjson.loads(await response.read())
+
+    def trim_content(self, content: str) -> str:
+        """Collapse redundant whitespace and truncate content to MAX_CONTENT_CHARS."""
+        content = _INLINE_WHITESPACE.sub(' ', content)
+        content = _BLANK_LINES.sub('\n\n', content)
+        return content.strip()[:MAX_CONTENT_CHARS]
+
+    async def extract_structured_data(self, content: str, url: str) -> Dict:
+        """Extract structured data from page content, using the cache before queueing an OpenAI call."""
+        content = self.trim_content(content)
+        cached = await self.read_cache(self.extraction_cache, self.extraction_cache_key(content))
+        if cached:
+            logger.info("Using cached extraction for %s", url)
+            return cached
+
+        # Only cache misses go through the batcher, so hits never wait behind a batch of LLM calls
+        return await self.extract_batcher.process((content, url))
+
+    async def extract_uncached(self, content: str, url: str) -> Dict:
+        """Call OpenAI for already-trimmed content and cache the result."""
+        cache_key = self.extraction_cache_key(content)
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert e-commerce data extractor and product classifier. Extract all available information from the provided content and format it according to the JSON structure provided. Generate comprehensive tags covering: product type, style, color, material, occasion, season, fit, trend, demographic, price tier. If information is not available, use null for single values or empty arrays [] for lists. Always generate at least 20 descriptive tags."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""Analyze this webpage content and extract all available information into the following structure. The webpage content is: {content}
-
-Please format the response exactly like this JSON structure, filling in all available information:
-
-{{
-    "product_details": {{
-        "title": "Complete product title",
-        "brand": "Brand name",
-        "sku": "Product SKU/ID",
-        "main_image": "Primary product image URL",
-        "secondary_images": ["URL1", "URL2"],
-        "price_information": {{
-            "current_price": "Current price with currency",
-            "original_price": "Original price if available",
-            "currency": "Currency code (e.g., USD)",
-            "discount_percentage": "Calculated discount if any",
-            "price_per_unit": "Price per unit if available",
-            "bulk_pricing": [
-                {{
-                    "quantity": "Minimum quantity",
-                    "price": "Price at this quantity"
-                }}
-            ]
-        }},
-        "availability": {{
-            "status": "in_stock/out_of_stock/preorder",
-            "quantity_available": "Stock level if shown",
-            "delivery_estimate": "Delivery timeframe"
-        }}
-    }},
-    "product_content": {{
-        "short_description": "Brief product overview",
-        "full_description": "Complete product description",
-        "key_features": ["Feature 1", "Feature 2"],
-        "bullet_points": ["Point 1", "Point 2"],
-        "usage_instructions": ["Step 1", "Step 2"],
-        "highlights": [
-            {{
-                "title": "Highlight title",
-                "description": "Highlight description"
-            }}
-        ]
-    }},
-    "technical_details": {{
-        "dimensions": {{
-            "length": "Length with unit",
-            "width": "Width with unit",
-            "height": "Height with unit",
-            "weight": "Weight with unit",
-            "package_dimensions": {{
-                "length": "Package length",
-                "width": "Package width",
-                "height": "Package height",
-                "weight": "Package weight"
-            }}
-        }},
-        "specifications": [
-            {{
-                "category": "Spec category",
-                "attributes": [
-                    {{
-                        "name": "Spec name",
-                        "value": "Spec value",
-                        "unit": "Unit if applicable"
-                    }}
-                ]
-            }}
-        ],
-        "materials": ["Material 1", "Material 2"],
-        "certifications": ["Cert 1", "Cert 2"],
-        "compatibility": ["Compatible item 1", "Compatible item 2"]
-    }},
-    "classification_tags": {{
-        "product_type_tags": ["polo shirt", "casual wear", "sportswear"],
-        "style_tags": ["classic", "modern", "preppy", "formal", "casual"],
-        "color_tags": ["navy blue", "dark blue", "solid color"],
-        "material_tags": ["cotton", "pique cotton", "natural fiber"],
-        "occasion_tags": ["casual", "semi-formal", "business casual", "weekend"],
-        "season_tags": ["summer", "spring", "year-round"],
-        "fit_tags": ["regular fit", "classic fit", "comfortable"],
-        "trend_tags": ["timeless", "classic style", "sustainable"],
-        "demographic_tags": ["men", "adult", "professional"],
-        "price_tier_tags": ["luxury", "high-end", "premium"],
-        "all_tags": [
-            # At least 20 comprehensive tags combining all aspects
-            "polo shirt",
-            "navy blue",
-            "cotton",
-            "luxury brand",
-            "business casual",
-            "men's fashion",
-            "summer wear",
-            "classic style",
-            "comfortable fit",
-            "professional attire",
-            "premium quality",
-            "solid color",
-            "casual elegance",
-            "weekend wear",
-            "natural materials",
-            "breathable fabric",
-            "versatile clothing",
-            "smart casual",
-            "timeless design",
-            "high-end fashion"
-        ]
-    }},
-    "additional_information": {{
-        "categories": ["Category 1", "Category 2"],
-        "model_number": "Model number if available",
-        "manufacturer": {{
-            "name": "Manufacturer name",
-            "country_of_origin": "Manufacturing country",
-            "contact_info": "Manufacturer contact details"
-        }},
-        "warranty": {{
-            "duration": "Warranty period",
-            "type": "Warranty type",
-            "coverage": ["Coverage detail 1", "Coverage detail 2"]
-        }},
-        "package_contents": ["Item 1", "Item 2"],
-        "related_products": [
-            {{
-                "title": "Related product name",
-                "url": "Related product URL",
-                "relationship_type": "Similar/Accessory/Complement"
-            }}
-        ]
-    }},
-    "purchase_information": {{
-        "shipping": {{
-            "methods": [
-                {{
-                    "name": "Shipping method",
-                    "cost": "Shipping cost",
-                    "estimated_days": "Delivery estimate"
-                }}
-            ],
-            "free_shipping_threshold": "Min order for free shipping",
-            "restrictions": ["Restriction 1", "Restriction 2"]
-        }},
-        "return_policy": {{
-            "duration": "Return window",
-            "conditions": ["Condition 1", "Condition 2"],
-            "restocking_fee": "Fee if applicable"
-        }},
-        "payment_methods": ["Method 1", "Method 2"]
-    }},
-    "reviews_and_ratings": {{
-        "average_rating": "Overall rating",
-        "total_reviews": "Number of reviews",
-        "rating_distribution": {{
-            "5_star": "Count of 5 star reviews",
-            "4_star": "Count of 4 star reviews",
-            "3_star": "Count of 3 star reviews",
-            "2_star": "Count of 2 star reviews",
-            "1_star": "Count of 1 star reviews"
-        }},
-        "featured_reviews": [
-            {{
-                "rating": "Review rating",
-                "title": "Review title",
-                "content": "Review content",
-                "author": "Reviewer name",
-                "date": "Review date",
-                "verified_purchase": "true/false"
-            }}
-        ]
-    }},
-    "metadata": {{
-        "source_url": "{url}",
-        "scrape_timestamp": "{datetime.now().isoformat()}",
-        "last_updated": "Product last updated date if shown",
-        "schema_version": "1.0"
-    }}
-}}"""
-                    }
-                ],
-                response_format={"type": "json_object"}
-            )
-            return json.loads(response.choices[0].message.content)
+            structured_data = await self.request_extraction(content, url)
+            await self.write_cache(self.extraction_cache, cache_key, structured_data)
+            return structured_data
         except Exception as e:
-            print(f"Error extracting structured data: {str(e)}")
+            logger.error("Error extracting structured data for %s: %s", url, e)
             return None
 
-    def process_single_url(self, url: str, output_file: str = None):
-        """Process a single URL."""
-        print(f"\nProcessing URL: {url}")
-        page_content = self.fetch_page_content(url)
-        
-        if page_content and 'data' in page_content:
-            content = page_content['data'].get('content', '')
-            structured_data = self.extract_structured_data(content, url)
-            
-            if structured_data:
-                # Save to MongoDB
-                self.save_to_mongodb(structured_data, url)
-                
-                # Save to file if specified
-                if output_file:
-                    self.save_results([structured_data], output_file)
-                    print(f"Results saved to {output_file}")
+    @retry_transient
+    async def request_extraction(self, content: str, url: str) -> Dict:
+        """Send a single extraction request to OpenAI and parse the JSON reply."""
+        await self.openai_limiter.acquire()
+        response = await self.openai_client.chat.completions.create(
+            model=EXTRACTION_MODEL,
+            messages=[
+                SYSTEM_MESSAGE,
+                {"role": "user", "content": USER_PROMPT_TEMPLATE.format(url=url, content=content)}
+            ],
+            response_format=RESPONSE_FORMAT
+        )
+        return orjson.loads(response.choices[0].message.content)
+
+    async def extract_batch(self, batch: List[tuple]) -> List[Dict]:
+        """Extract structured data for one micro-batch of (content, url) pairs concurrently."""
+        return await asyncio.gather(*(self.extract_uncached(content, url) for content, url in batch))
+
+    async def fetch_and_extract(self, url: str, seen: 'OrderedDict[str, asyncio.Task]') -> Dict:
+        """Fetch and extract a single URL, returning its structured data.
+
+        seen maps content hashes to extraction tasks for the most recent
+        SEEN_CONTENT_LIMIT distinct pages, so identical content is only sent to
+        OpenAI once while memory stays bounded on large runs.
+        """
+        page_content = await self.fetch_page_content(url)
+        if not page_content or 'data' not in page_content:
+            logger.error("Failed to fetch page content for %s", url)
+            return None
+
+        content = page_content['data'].get('content') or ''
+        content_hash = self.hash_content(content)
+        extraction = seen.get(content_hash)
+        if extraction is None:
+            extraction = asyncio.ensure_future(self.extract_structured_data(content, url))
+            seen[content_hash] = extraction
+            if len(seen) > SEEN_CONTENT_LIMIT:
+                seen.popitem(last=False)
         else:
-            print("Failed to fetch page content")
+            seen.move_to_end(content_hash)
+        extracted = await extraction
+        if not extracted:
+            return None
+
+        # Each URL gets its own copy so duplicates keep their own source URL
+        structured_data = copy.deepcopy(extracted)
+        structured_data.setdefault('metadata', {})['source_url'] = url
+        return structured_data
+
+    async def process_one(self, url: str, seen: 'OrderedDict[str, asyncio.Task]') -> Dict:
+        """Fetch, extract and save a single URL, returning its structured data."""
+        structured_data = await self.fetch_and_extract(url, seen)
+        if structured_data:
+            await self.save_to_mongodb(structured_data, url)
+        return structured_data
+
+    async def process_single_url(self, url: str, output_file: str = None):
+        """Process a single URL."""
+        logger.info("Processing URL: %s", url)
+        structured_data = await self.process_one(url, OrderedDict())
+        await self.flush_mongodb()
+
+        # Save to file if specified
+        if structured_data and output_file:
+            self.save_results([structured_data], output_file)
+            logger.info("Results saved to %s", output_file)
 
-    def read_urls_from_csv(self, filename: str) -> List[str]:
-        """Read URLs from a CSV file."""
-        urls = []
+    def iter_urls_from_csv(self, filename: str) -> Iterator[str]:
+        """Yield URLs from a CSV file one at a time."""
         with open(filename, 'r') as file:
             reader = csv.reader(file)
             for row in reader:
                 if row:  # Skip empty rows
-                    urls.append(row[0].strip())
-        return urls
+                    yield row[0].strip()
 
     def save_results(self, results: Dict, output_file: str):
         """Save results to a JSON file."""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
 
-    def process_urls(self, input_csv: str, output_file: str = None):
-        """Process multiple URLs from a CSV file."""
-        urls = self.read_urls_from_csv(input_csv)
-        all_results = []
+    async def process_urls(self, input_csv: str, output_file: str = None):
+        """Process multiple URLs from a CSV file, writing results to output_file as JSON Lines.
 
-        for url in urls:
-            print(f"\nProcessing {url}")
-            page_content = self.fetch_page_content(url)
-            
-            if page_content and 'data' in page_content:
-                content = page_content['data'].get('content', '')
-                structured_data = self.extract_structured_data(content, url)
-                
-                if structured_data:
-                    # Save to MongoDB
-                    self.save_to_mongodb(structured_data, url)
-                    all_results.append(structured_data)
-        
-        # Optionally save to file if output_file is provided
-        if output_file:
-            self.save_results(all_results, output_file)
-            print(f"Results saved to {output_file}")
+        URLs are streamed from the CSV through a bounded queue to a pool of workers, each
+        running one URL through fetch -> extract -> save so all three stages overlap.
+        """
+        queue = asyncio.Queue(maxsize=URL_QUEUE_SIZE)
+        seen = OrderedDict()
+
+        async def producer():
+            for url in self.iter_urls_from_csv(input_csv):
+                await queue.put(url)
+            # One sentinel per worker signals there are no more URLs
+            for _ in range(MAX_CONCURRENT_URLS):
+                await queue.put(None)
+
+        async def worker():
+            while True:
+                url = await queue.get()
+                if url is None:
+                    return
+                logger.info("Processing URL: %s", url)
+                # A failure on one URL is logged and skipped so it can't stop the other workers
+                try:
+                    structured_data = await self.process_one(url, seen)
+                except Exception as e:
+                    logger.error("Error processing %s: %s", url, e)
+                    continue
+                if structured_data and output:
+                    output.write(orjson.dumps(structured_data) + b'\n')
+                    # Flush each line so completed records survive a crash mid-run
+                    output.flush()
+
+        # Write one record per line as each URL completes instead of one array at the end
+        output = open(output_file, 'wb') if output_file else None
+        try:
+            await asyncio.gather(producer(), *(worker() for _ in range(MAX_CONCURRENT_URLS)))
+        finally:
+            await self.flush_mongodb()
+            if output:
+                output.close()
+                logger.info("Results saved to %s", output_file)
+
+    async def process_urls_multiprocess(self, input_csv: str, output_file: str = None, processes: int = None):
+        """Like process_urls, but fetches and extracts across several processes, each with its own event loop.
+
+        URLs are submitted to the pool a bounded number at a time. Workers only fetch
+        and extract; results come back here as they complete to be saved to MongoDB
+        and written to output_file. Rate limits are split evenly between workers,
+        and content dedup only applies within each worker.
+        """
+        processes = processes or os.cpu_count()
+        # Caps URLs handed to the pool at once, so the CSV is read only as fast as workers drain it
+        in_flight = asyncio.Semaphore(processes * CHILD_CONCURRENCY)
+        tasks = set()
+
+        async def submit(pool: Pool, url: str):
+            try:
+                url, structured_data = await pool.apply(_fetch_and_extract_in_worker, (url,))
+            except Exception as e:
+                logger.error("Error processing %s in worker: %s", url, e)
+                return
+            finally:
+                in_flight.release()
+            # Results are handled as each URL completes, not in CSV order
+            if structured_data:
+                await self.save_to_mongodb(structured_data, url)
+                if output:
+                    output.write(orjson.dumps(structured_data) + b'\n')
+                    # Flush each line so completed records survive a crash mid-run
+                    output.flush()
+
+        output = open(output_file, 'wb') if output_file else None
+        try:
+            async with Pool(
+                processes=processes,
+                childconcurrency=CHILD_CONCURRENCY,
+                initializer=_init_worker,
+                initargs=(self.db.name, self.collection.name, 1 / processes),
+                loop_initializer=uvloop.new_event_loop if uvloop else None
+            ) as pool:
+                for url in self.iter_urls_from_csv(input_csv):
+                    await in_flight.acquire()
+                    task = asyncio.create_task(submit(pool, url))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                await asyncio.gather(*tasks)
+                # Let workers exit on their own so their teardown runs; leaving the block terminates them
+                pool.close()
+                await pool.join()
+        finally:
+            await self.flush_mongodb()
+            if output:
+                output.close()
+                logger.info("Results saved to %s", output_file)
+
+# Per-process scraper reused by every task in a worker, so each worker keeps one connection pool
+_worker_scraper: UniversalScraper = None
+_worker_seen: 'OrderedDict[str, asyncio.Task]' = OrderedDict()
+
+def _init_worker(db_name: str, collection_name: str, rate_share: float):
+    """Set up logging and the per-process scraper in a Pool worker."""
+    global _worker_scraper
+    configure_logging()
+    _worker_scraper = UniversalScraper(db_name=db_name, collection_name=collection_name, rate_share=rate_share)
+    # Pool has no worker shutdown hook; spawned workers run atexit handlers on normal exit
+    atexit.register(_close_worker)
+
+def _close_worker():
+    """Close the per-process scraper on the worker's event loop, which is left open once it finishes."""
+    loop = asyncio.get_event_loop()
+    if _worker_scraper is not None and not loop.is_closed():
+        loop.run_until_complete(_worker_scraper.aclose())
+        loop.close()
+
+async def _fetch_and_extract_in_worker(url: str) -> tuple:
+    logger.info("Processing URL: %s", url)
+    return url, await _worker_scraper.fetch_and_extract(url, _worker_seen)
+
+def configure_logging():
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+        format='%(asctime)s %(levelname)s %(message)s'
+    )
 
 def main():
+    configure_logging()
+
     # Create a new scraper instance with a unique collection name
     collection_name = f"product_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     scraper = UniversalScraper(db_name="web_scraper", collection_name=collection_name)
     
-    # You can either process a single URL
-    # scraper.process_single_url("https://example.com/product", "single_product.json")
-    
-    # Or process multiple URLs from a CSV file
-    scraper.process_urls('urls.csv', 'scraped_data.json')
+    if uvloop:
+        uvloop.run(run(scraper))
+    else:
+        asyncio.run(run(scraper))
+
+async def run(scraper: UniversalScraper):
+    try:
+        # You can either process a single URL
+        # await scraper.process_single_url("https://example.com/product", "single_product.json")
+        
+        # Or process multiple URLs from a CSV file
+        await scraper.process_urls('urls.csv', 'scraped_data.jsonl')
+        
+        # Or, for very large CSV files, spread them across one worker process per CPU core
+        # await scraper.process_urls_multiprocess('urls.csv', 'scraped_data.jsonl')
+    finally:
+        await scraper.aclose()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file